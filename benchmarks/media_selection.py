@@ -0,0 +1,111 @@
+"""CPU time and output size of ``normalize_post_node`` under media policies.
+
+CPU time is reported for normalization alone and together with serializing
+the result to JSON. Best-only selection still visits every candidate, so
+normalization time is roughly unchanged; the savings show up in output size
+and serialization. Skipping images or all media is what cuts normalization.
+
+Uses synthetic carousel-heavy GraphQL nodes shaped like the XDT timeline
+payload: 10-item carousels with 8 image candidates per item and video
+versions on every third item.
+
+    python -m benchmarks.media_selection
+"""
+import json
+import time
+from typing import Any, Dict, List
+
+from scraper.parsers.post_parser import (
+    ALL_MEDIA,
+    BEST_MEDIA,
+    NO_MEDIA,
+    MediaPolicy,
+    normalize_post_node,
+)
+
+POSTS = 2000
+CAROUSEL_ITEMS = 10
+IMAGE_CANDIDATES = 8
+VIDEO_VERSIONS = 3
+REPEATS = 5
+CDN = "https://scontent.cdninstagram.com/v/t51.2885-15/{}_n.jpg?stp=dst-jpg_e35_s{}x{}&_nc_ht=scontent.cdninstagram.com&oh=00_AfExample&oe=69256701"
+
+
+def _versions(key: str, count: int) -> List[Dict[str, Any]]:
+    versions = []
+    for idx in range(count):
+        width = 1440 - idx * 160
+        versions.append(
+            {
+                "url": CDN.format(f"{key}_{idx}", width, width),
+                "width": width,
+                "height": width,
+            }
+        )
+    return versions
+
+
+def build_nodes() -> List[Dict[str, Any]]:
+    nodes = []
+    for post in range(POSTS):
+        items = []
+        for item in range(CAROUSEL_ITEMS):
+            media: Dict[str, Any] = {
+                "id": f"{post}_{item}",
+                "image_versions2": {
+                    "candidates": _versions(f"{post}_{item}", IMAGE_CANDIDATES)
+                },
+            }
+            if item % 3 == 0:
+                media["video_versions"] = _versions(f"{post}_{item}_v", VIDEO_VERSIONS)
+            items.append(media)
+        nodes.append(
+            {
+                "id": str(post),
+                "code": f"C{post:06d}",
+                "media_type": 8,
+                "taken_at": 1_700_000_000 + post,
+                "caption": {"text": f"post {post}"},
+                "like_count": post,
+                "comment_count": post // 10,
+                "carousel_media": items,
+            }
+        )
+    return nodes
+
+
+def measure(label: str, policy: MediaPolicy, nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    best_parse = best_total = float("inf")
+    for _ in range(REPEATS):
+        started = time.process_time()
+        posts = [normalize_post_node(node, policy) for node in nodes]
+        parsed = time.process_time()
+        output = json.dumps(posts, ensure_ascii=False).encode("utf-8")
+        finished = time.process_time()
+        best_parse = min(best_parse, parsed - started)
+        best_total = min(best_total, finished - started)
+
+    per_1k = 1000 * 1000 / len(nodes)
+    return {
+        "policy": label,
+        "normalize_cpu_ms_per_1k": round(best_parse * per_1k, 2),
+        "normalize_and_dump_cpu_ms_per_1k": round(best_total * per_1k, 2),
+        "urls_per_post": round(sum(len(p["media_urls"]) for p in posts) / len(posts), 1),
+        "output_kb": round(len(output) / 1024, 1),
+    }
+
+
+def main() -> None:
+    nodes = build_nodes()
+    results = [
+        measure("all (default)", ALL_MEDIA, nodes),
+        measure("best-only", BEST_MEDIA, nodes),
+        measure("best image, max 1 per item", MediaPolicy(best_only=True, max_per_item=1), nodes),
+        measure("best video only", MediaPolicy(best_only=True, images=False), nodes),
+        measure("metadata-only", NO_MEDIA, nodes),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Adaptive vs. fixed GraphQL page sizing against a simulated server.
+
+The fake server's latency grows linearly with page size and large pages start
+timing out, so neither the smallest nor the largest fixed size is optimal.
+Time is simulated, so the benchmark runs instantly and is deterministic.
+
+    python -m benchmarks.page_sizing
+"""
+import json
+import random
+from typing import Any, Dict, List
+
+from scraper.http_client import RequestFailedError
+from scraper.instagram_scraper import InstagramScraper
+from scraper.page_sizing import AdaptivePageSizer, PageSizingConfig
+
+TOTAL_POSTS = 20000
+MIN_POSTS = 10000
+BASE_LATENCY = 1.0
+LATENCY_PER_ITEM = 0.05
+SAFE_PAGE_SIZE = 30
+FAILURE_SLOPE = 1 / 25
+RETRY_PENALTY = 7.0  # HttpClient backoff: 1 + 2 + 4 seconds
+
+
+class SimulatedClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, payload: Dict[str, Any]) -> None:
+        self.content = json.dumps(payload).encode("utf-8")
+        self._payload = payload
+
+    def json(self) -> Dict[str, Any]:
+        return self._payload
+
+
+class FakeGraphQLServer:
+    def __init__(self, clock: SimulatedClock, seed: int = 7) -> None:
+        self.clock = clock
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+
+    def get(self, path: str, params: Dict[str, Any] | None = None, **_: Any) -> FakeResponse:
+        variables = json.loads((params or {})["variables"])
+        size = variables["first"]
+        offset = int(variables["after"] or 0)
+
+        self.requests += 1
+        latency = (BASE_LATENCY + LATENCY_PER_ITEM * size) * self.rng.uniform(0.8, 1.2)
+        self.clock.now += latency
+        if self.rng.random() < max(0.0, (size - SAFE_PAGE_SIZE) * FAILURE_SLOPE):
+            self.errors += 1
+            self.clock.now += RETRY_PENALTY
+            raise RequestFailedError(f"GET {path} failed after retries", status=504)
+
+        end = min(TOTAL_POSTS, offset + size)
+        edges = [
+            {"node": {"id": str(i), "shortcode": f"p{i}", "taken_at": 1_700_000_000 + i}}
+            for i in range(offset, end)
+        ]
+        return FakeResponse(
+            {
+                "data": {
+                    "user": {
+                        "edge_owner_to_timeline_media": {
+                            "edges": edges,
+                            "page_info": {
+                                "has_next_page": end < TOTAL_POSTS,
+                                "end_cursor": str(end),
+                            },
+                        }
+                    }
+                }
+            }
+        )
+
+
+def run(label: str, config: PageSizingConfig) -> Dict[str, Any]:
+    clock = SimulatedClock()
+    server = FakeGraphQLServer(clock)
+    scraper = InstagramScraper(page_sizer=AdaptivePageSizer(config, clock=clock))
+    scraper.graphql_lsd = None
+    scraper.graphql_client = server
+
+    user_data = {
+        "id": "1",
+        "edge_owner_to_timeline_media": {
+            "edges": [],
+            "page_info": {"has_next_page": True, "end_cursor": "0"},
+        },
+    }
+    pages: List[Dict[str, Any]] = []
+    posts = scraper.scrape_posts("bench", MIN_POSTS, user_data=user_data, pages=pages)
+    sizes = scraper.page_sizer.metadata(pages)["graphql_page_sizes"]
+    return {
+        "strategy": label,
+        "posts": len(posts),
+        "requests": server.requests,
+        "errors": server.errors,
+        "sim_seconds": round(clock.now, 1),
+        "posts_per_second": round(len(posts) / clock.now, 2) if clock.now else 0.0,
+        "final_size": sizes.get("query_hash"),
+    }
+
+
+def main() -> None:
+    scenarios: List[Dict[str, Any]] = [
+        run("fixed-50", PageSizingConfig(min_size=50, max_size=50)),
+        run("fixed-12", PageSizingConfig(min_size=12, max_size=12)),
+        run("fixed-24", PageSizingConfig(min_size=24, max_size=24)),
+        run("adaptive", PageSizingConfig(min_size=6, max_size=50)),
+    ]
+    print(json.dumps(scenarios, indent=2))
+
+
+if __name__ == "__main__":
+    main()
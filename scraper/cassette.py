@@ -0,0 +1,157 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+RECORD = "record"
+REPLAY = "replay"
+CASSETTE_MODES = (RECORD, REPLAY)
+INDEX_FILENAME = "index.jsonl"
+OBJECTS_DIRNAME = "objects"
+# Session tokens that rotate between crawls and must not change the key.
+VOLATILE_FIELDS = ("lsd",)
+
+
+class CassetteError(Exception):
+    pass
+
+
+def request_key(
+    method: str,
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    data: Optional[Dict[str, Any]] = None,
+    json_body: Optional[Any] = None,
+) -> str:
+    """Stable key for a request: method + URL + sorted params + body."""
+
+    def stable(fields: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            name: value
+            for name, value in (fields or {}).items()
+            if name not in VOLATILE_FIELDS
+        }
+
+    canonical = json.dumps(
+        {
+            "method": method.upper(),
+            "url": url,
+            "params": stable(params),
+            "data": stable(data),
+            "json": json_body,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """Archive of raw HTTP responses for offline re-processing.
+
+    Response bodies are gzip-compressed and stored content-addressed under
+    ``objects/`` (identical bodies are written once). ``index.jsonl`` maps
+    each request key to the status, headers and body hash; later entries win.
+    """
+
+    def __init__(self, root: str, mode: str = REPLAY) -> None:
+        if mode not in CASSETTE_MODES:
+            raise CassetteError(
+                f"Unknown cassette mode {mode!r}, expected one of {CASSETTE_MODES}"
+            )
+        self.root = root
+        self.mode = mode
+        self.objects_dir = os.path.join(root, OBJECTS_DIRNAME)
+        self.index_path = os.path.join(root, INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._index: Dict[str, Dict[str, Any]] = {}
+
+        if mode == RECORD:
+            os.makedirs(self.objects_dir, exist_ok=True)
+        elif not os.path.exists(self.index_path):
+            raise CassetteError(f"No cassette index at {self.index_path}")
+        self._load_index()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    def _load_index(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    self._index[entry["key"]] = entry
+
+    def _write_entry(self, entry: Dict[str, Any]) -> None:
+        with open(self.index_path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._index[entry["key"]] = entry
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.gz")
+
+    def record(
+        self,
+        key: str,
+        method: str,
+        url: str,
+        resp: requests.Response,
+        request_seconds: float | None = None,
+    ) -> None:
+        body = resp.content or b""
+        digest = hashlib.sha256(body).hexdigest()
+        entry = {
+            "key": key,
+            "method": method.upper(),
+            "url": url,
+            "status": resp.status_code,
+            "final_url": resp.url,
+            "headers": {
+                name: value
+                for name, value in resp.headers.items()
+                if name.lower() == "content-type"
+            },
+            "encoding": resp.encoding,
+            "elapsed": resp.elapsed.total_seconds(),
+            "request_seconds": request_seconds,
+            "body": digest,
+        }
+
+        path = self._object_path(digest)
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with gzip.open(tmp_path, "wb") as fh:
+                    fh.write(body)
+                os.replace(tmp_path, path)
+            self._write_entry(entry)
+
+    def replay(self, key: str, method: str, url: str) -> requests.Response:
+        entry = self._index.get(key)
+        if entry is None:
+            raise CassetteError(f"{method.upper()} {url} not found in cassette")
+
+        with gzip.open(self._object_path(entry["body"]), "rb") as fh:
+            body = fh.read()
+
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp.url = entry.get("final_url") or url
+        resp.headers = CaseInsensitiveDict(entry.get("headers") or {})
+        resp.encoding = entry.get("encoding")
+        resp.elapsed = timedelta(seconds=entry.get("elapsed") or 0.0)
+        resp._content = body
+        resp.request_seconds = entry.get("request_seconds")
+        return resp
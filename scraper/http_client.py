@@ -4,6 +4,9 @@ from typing import Optional, Dict, Any
 
 import requests
 
+from .cassette import Cassette, request_key
+from .tracing import NULL_TRACER, NullTracer, Tracer
+
 DEFAULT_TIMEOUT = 15
 
 USER_AGENTS = [
@@ -16,15 +19,27 @@ USER_AGENTS = [
 ]
 
 
+class RequestFailedError(RuntimeError):
+    """Retries ran out; ``status`` is the last HTTP status seen, if any."""
+
+    def __init__(self, message: str, status: int | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+
 class HttpClient:
     def __init__(
         self,
         base_url: str = "https://www.instagram.com",
         extra_headers: Optional[Dict[str, str]] = None,
+        cassette: Optional[Cassette] = None,
+        tracer: Tracer | NullTracer = NULL_TRACER,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.session = requests.Session()
         self.extra_headers = extra_headers or {}
+        self.cassette = cassette
+        self.tracer = tracer
 
     def _random_headers(self) -> Dict[str, str]:
         headers: Dict[str, str] = {
@@ -36,6 +51,19 @@ class HttpClient:
         headers.update(self.extra_headers)
         return headers
 
+    @staticmethod
+    def _finish(resp: requests.Response, started: float, slept: float) -> None:
+        # Wall clock across attempts minus backoff sleeps, so rate limiting does
+        # not read as a slow response; cassettes store it for replays.
+        resp.request_seconds = time.perf_counter() - started - slept
+
+    def _backoff(self, attempt: int) -> float:
+        sleep_for = 2 ** attempt
+        started = time.perf_counter()
+        with self.tracer.span("http.backoff_sleep", attempt=attempt, seconds=sleep_for):
+            time.sleep(sleep_for)
+        return time.perf_counter() - started
+
     def get(
         self,
         path: str,
@@ -46,37 +74,55 @@ class HttpClient:
     ) -> requests.Response:
         """Basic GET with simple exponential backoff."""
         url = path if path.startswith("http") else f"{self.base_url}{path}"
+        key = request_key("GET", url, params=params) if self.cassette else None
+        if self.cassette and self.cassette.replaying:
+            with self.tracer.span("http.replay", method="GET", url=url):
+                return self.cassette.replay(key, "GET", url)
 
+        started = time.perf_counter()
         attempt = 0
         last_exc: Optional[Exception] = None
+        last_status: Optional[int] = None
+        slept = 0.0
 
         while attempt <= max_retries:
             try:
                 request_headers = self._random_headers()
                 if headers:
                     request_headers.update(headers)
-                resp = self.session.get(
-                    url,
-                    params=params,
-                    headers=request_headers,
-                    timeout=timeout,
-                )
+                with self.tracer.span(
+                    "http.attempt", method="GET", url=url, attempt=attempt
+                ) as span:
+                    resp = self.session.get(
+                        url,
+                        params=params,
+                        headers=request_headers,
+                        timeout=timeout,
+                    )
+                    span.set(status=resp.status_code, bytes=len(resp.content))
 
                 if resp.status_code in (429, 500, 502, 503, 504):
-                    sleep_for = 2 ** attempt
-                    time.sleep(sleep_for)
+                    last_status = resp.status_code
+                    slept += self._backoff(attempt)
                     attempt += 1
                     continue
 
                 resp.raise_for_status()
+                self._finish(resp, started, slept)
+                if self.cassette:
+                    self.cassette.record(
+                        key, "GET", url, resp, request_seconds=resp.request_seconds
+                    )
                 return resp
             except requests.RequestException as exc:
                 last_exc = exc
-                sleep_for = 2 ** attempt
-                time.sleep(sleep_for)
+                last_status = exc.response.status_code if exc.response is not None else None
+                slept += self._backoff(attempt)
                 attempt += 1
 
-        raise RuntimeError(f"GET {url} failed after retries") from last_exc
+        raise RequestFailedError(
+            f"GET {url} failed after retries", status=last_status
+        ) from last_exc
 
     def post(
         self,
@@ -90,36 +136,58 @@ class HttpClient:
     ) -> requests.Response:
         """POST helper mirroring the retry logic from GET."""
         url = path if path.startswith("http") else f"{self.base_url}{path}"
-
+        key = (
+            request_key("POST", url, params=params, data=data, json_body=json)
+            if self.cassette
+            else None
+        )
+        if self.cassette and self.cassette.replaying:
+            with self.tracer.span("http.replay", method="POST", url=url):
+                return self.cassette.replay(key, "POST", url)
+
+        started = time.perf_counter()
         attempt = 0
         last_exc: Optional[Exception] = None
+        last_status: Optional[int] = None
+        slept = 0.0
 
         while attempt <= max_retries:
             try:
                 request_headers = self._random_headers()
                 if headers:
                     request_headers.update(headers)
-                resp = self.session.post(
-                    url,
-                    params=params,
-                    data=data,
-                    json=json,
-                    headers=request_headers,
-                    timeout=timeout,
-                )
+                with self.tracer.span(
+                    "http.attempt", method="POST", url=url, attempt=attempt
+                ) as span:
+                    resp = self.session.post(
+                        url,
+                        params=params,
+                        data=data,
+                        json=json,
+                        headers=request_headers,
+                        timeout=timeout,
+                    )
+                    span.set(status=resp.status_code, bytes=len(resp.content))
 
                 if resp.status_code in (429, 500, 502, 503, 504):
-                    sleep_for = 2 ** attempt
-                    time.sleep(sleep_for)
+                    last_status = resp.status_code
+                    slept += self._backoff(attempt)
                     attempt += 1
                     continue
 
                 resp.raise_for_status()
+                self._finish(resp, started, slept)
+                if self.cassette:
+                    self.cassette.record(
+                        key, "POST", url, resp, request_seconds=resp.request_seconds
+                    )
                 return resp
             except requests.RequestException as exc:
                 last_exc = exc
-                sleep_for = 2 ** attempt
-                time.sleep(sleep_for)
+                last_status = exc.response.status_code if exc.response is not None else None
+                slept += self._backoff(attempt)
                 attempt += 1
 
-        raise RuntimeError(f"POST {url} failed after retries") from last_exc
+        raise RequestFailedError(
+            f"POST {url} failed after retries", status=last_status
+        ) from last_exc
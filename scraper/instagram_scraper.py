@@ -1,17 +1,35 @@
 import json
 from typing import Any, Dict, List, Tuple
 
-from .http_client import HttpClient
-from .parsers.profile_parser import ProfileParseError, parse_profile
+import requests
+
+from .cassette import Cassette
+from .http_client import HttpClient, RequestFailedError
+from .page_sizing import AdaptivePageSizer, PageSizingConfig
+from .parsers.profile_parser import ProfileParseError, normalize_user, parse_profile
 from .parsers.post_parser import (
+    ALL_MEDIA,
+    MediaPolicy,
     build_doc_id_variables,
     build_query_hash_variables,
     extract_media_connection,
     normalize_post_node,
 )
+from .raw_archive import POSTS_KIND, RawArchive
 from .settings import ScraperSettings
+from .tracing import NULL_TRACER, NullTracer, Tracer, current_span, traced
 
 MAX_GRAPHQL_PAGE_SIZE = 50
+MAX_PAGE_RETRIES = 2
+
+
+def _size_related(exc: Exception) -> bool:
+    """Whether a smaller page might have succeeded: read timeouts and 5xx."""
+    if not isinstance(exc, RequestFailedError):
+        return False
+    if exc.status is None:
+        return isinstance(exc.__cause__, requests.ReadTimeout)
+    return exc.status >= 500
 
 
 class InstagramScraper:
@@ -19,11 +37,30 @@ class InstagramScraper:
         self,
         graphql_doc_id: str | None = None,
         graphql_query_hash: str | None = None,
+        page_sizer: AdaptivePageSizer | None = None,
+        cassette: Cassette | None = None,
+        raw_archive: RawArchive | None = None,
+        tracer: Tracer | NullTracer | None = None,
+        media_policy: MediaPolicy = ALL_MEDIA,
     ) -> None:
         settings = ScraperSettings.from_env()
+        self.settings = settings
+        if tracer is None:
+            tracer = Tracer() if settings.trace_file else NULL_TRACER
+        self.tracer = tracer
+        if cassette is None and settings.cassette_dir:
+            cassette = Cassette(settings.cassette_dir, mode=settings.cassette_mode)
+        self.cassette = cassette
+        if raw_archive is None and settings.raw_archive_dir:
+            raw_archive = RawArchive(settings.raw_archive_dir)
+        self.raw_archive = raw_archive
+        self.media_policy = media_policy
         self.graphql_doc_id = graphql_doc_id or settings.graphql_doc_id
         self.graphql_query_hash = graphql_query_hash or settings.graphql_query_hash
         self.graphql_lsd = settings.graphql_lsd
+        self.page_sizer = page_sizer or AdaptivePageSizer(
+            PageSizingConfig(max_size=MAX_GRAPHQL_PAGE_SIZE)
+        )
 
         common_headers = settings.common_headers()
         browser_like = {"Sec-Fetch-Site": "same-origin"}
@@ -31,6 +68,8 @@ class InstagramScraper:
         self.web_client = HttpClient(
             base_url="https://www.instagram.com",
             extra_headers={**common_headers, **browser_like},
+            cassette=cassette,
+            tracer=tracer,
         )
 
         self.api_client = HttpClient(
@@ -40,6 +79,8 @@ class InstagramScraper:
                 "x-ig-app-id": settings.x_ig_app_id,
                 **browser_like,
             },
+            cassette=cassette,
+            tracer=tracer,
         )
 
         graphql_headers = {
@@ -56,49 +97,24 @@ class InstagramScraper:
         self.graphql_client = HttpClient(
             base_url="https://www.instagram.com",
             extra_headers=graphql_headers,
+            cassette=cassette,
+            tracer=tracer,
         )
 
+    @traced("scraper.load_user_from_api")
     def load_user_from_api(self, username: str) -> Dict[str, Any]:
         resp = self.api_client.get(
             "/api/v1/users/web_profile_info/",
             params={"username": username},
         )
-        data = resp.json()
+        with self.tracer.span("parse.json"):
+            data = resp.json()
         return data["data"]["user"]
 
     def normalize_profile_from_user(self, user: Dict[str, Any]) -> Dict[str, Any]:
-        follower_count = user.get("edge_followed_by", {}).get("count")
-        following_count = user.get("edge_follow", {}).get("count")
-        posts_count = user.get("edge_owner_to_timeline_media", {}).get("count")
-
-        profile_pic_url = (
-            user.get("profile_pic_url_hd")
-            or user.get("profile_pic_url")
-            or None
-        )
-
-        category = (
-            user.get("category_name")
-            or user.get("business_category_name")
-            or user.get("category_enum")
-        )
-
-        biography = user.get("biography") or user.get("bio")
-
-        return {
-            "username": user.get("username"),
-            "full_name": user.get("full_name"),
-            "biography": biography,
-            "follower_count": follower_count,
-            "following_count": following_count,
-            "posts_count": posts_count,
-            "profile_picture_url": profile_pic_url,
-            "is_verified": bool(user.get("is_verified")),
-            "category": category,
-            "external_url": user.get("external_url"),
-            "id": user.get("id"),
-        }
+        return normalize_user(user)
 
+    @traced("scraper.scrape_profile_fallback")
     def scrape_profile_fallback(
         self,
         username: str,
@@ -106,9 +122,11 @@ class InstagramScraper:
         path = f"/{username}/"
         resp = self.web_client.get(path)
         html = resp.text
-        profile = parse_profile(html, username=username)
+        with self.tracer.span("parse.profile_html", bytes=len(html)):
+            profile = parse_profile(html, username=username)
         return profile, None
 
+    @traced("scraper.scrape_profile")
     def scrape_profile(
         self,
         username: str,
@@ -129,34 +147,60 @@ class InstagramScraper:
                     None,
                 )
 
+    def _archive_edges(self, username: str, edges: List[Dict[str, Any]]) -> None:
+        if self.raw_archive:
+            self.raw_archive.write_page(
+                username,
+                POSTS_KIND,
+                [edge.get("node", {}) for edge in edges],
+            )
+
+    def _page_elapsed(self, resp: Any, started: float) -> float:
+        # HttpClient's timing, which a replayed response carries from the
+        # recording; responses without it fall back to the sizer's clock.
+        seconds = getattr(resp, "request_seconds", None)
+        return self.page_sizer.clock() - started if seconds is None else seconds
+
+    def _record_page_failure(
+        self,
+        strategy: str,
+        size: int,
+        started: float,
+        pages: List[Dict[str, Any]],
+        size_related: bool = False,
+    ) -> None:
+        pages.append(
+            self.page_sizer.record(
+                strategy,
+                requested=size,
+                elapsed=self.page_sizer.clock() - started,
+                error=True,
+                size_related=size_related,
+            )
+        )
+
+    @traced("scraper.fetch_posts_page")
     def fetch_posts_page(
         self,
         username: str,
         user_id: str,
         after: str | None,
         batch_size: int,
+        pages: List[Dict[str, Any]] | None = None,
     ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
-        tokens: List[Tuple[str, str, Dict[str, Any], bool]] = []
+        """Fetch one GraphQL page; ``batch_size`` caps the adaptive page size.
+
+        A log entry per attempted strategy is appended to ``pages``.
+        """
+        if pages is None:
+            pages = []
+        tokens: List[Tuple[str, str, bool]] = []
         doc_id_ready = self.graphql_doc_id and self.graphql_lsd
 
         if doc_id_ready:
-            tokens.append(
-                (
-                    "doc_id",
-                    self.graphql_doc_id,
-                    build_doc_id_variables(username, after, batch_size),
-                    True,
-                )
-            )
+            tokens.append(("doc_id", self.graphql_doc_id, True))
         if self.graphql_query_hash and user_id:
-            tokens.append(
-                (
-                    "query_hash",
-                    self.graphql_query_hash,
-                    build_query_hash_variables(user_id, after, batch_size),
-                    False,
-                )
-            )
+            tokens.append(("query_hash", self.graphql_query_hash, False))
 
         if not tokens:
             raise RuntimeError(
@@ -165,44 +209,60 @@ class InstagramScraper:
 
         last_error: Exception | None = None
 
-        for idx, (token_label, token_value, variables, prefer_xdt) in enumerate(tokens):
+        for idx, token in enumerate(tokens):
+            token_label, token_value, prefer_xdt = token
             fallback_available = idx < len(tokens) - 1
+            # Sized only when attempted, so an unused fallback is not reported.
+            size = self.page_sizer.next_size(token_label, batch_size)
+            if token_label == "doc_id":
+                variables = build_doc_id_variables(username, after, size)
+            else:
+                variables = build_query_hash_variables(user_id, after, size)
             serialized_variables = json.dumps(variables, separators=(",", ":"))
+            started = self.page_sizer.clock()
 
             try:
-                if token_label == "doc_id":
-                    data = {
-                        "lsd": self.graphql_lsd,
-                        "doc_id": token_value,
-                        "variables": serialized_variables,
-                    }
-                    headers = {
-                        "Content-Type": "application/x-www-form-urlencoded",
-                        "X-FB-LSD": self.graphql_lsd or "",
-                    }
-                    resp = self.graphql_client.post(
-                        "/graphql/query/",
-                        data=data,
-                        headers=headers,
-                    )
-                else:
-                    params = {
-                        "variables": serialized_variables,
-                        token_label: token_value,
-                    }
-                    resp = self.graphql_client.get(
-                        "/graphql/query/",
-                        params=params,
-                    )
+                with self.tracer.span(
+                    "graphql.request", strategy=token_label, batch_size=size
+                ):
+                    if token_label == "doc_id":
+                        data = {
+                            "lsd": self.graphql_lsd,
+                            "doc_id": token_value,
+                            "variables": serialized_variables,
+                        }
+                        headers = {
+                            "Content-Type": "application/x-www-form-urlencoded",
+                            "X-FB-LSD": self.graphql_lsd or "",
+                        }
+                        resp = self.graphql_client.post(
+                            "/graphql/query/",
+                            data=data,
+                            headers=headers,
+                        )
+                    else:
+                        params = {
+                            "variables": serialized_variables,
+                            token_label: token_value,
+                        }
+                        resp = self.graphql_client.get(
+                            "/graphql/query/",
+                            params=params,
+                        )
             except Exception as exc:
+                self._record_page_failure(
+                    token_label, size, started, pages, size_related=_size_related(exc)
+                )
                 last_error = exc
                 if fallback_available:
                     continue
                 raise
 
             try:
-                data = resp.json()
+                with self.tracer.span("parse.json", bytes=len(resp.content or b"")):
+                    data = resp.json()
             except Exception as exc:
+                self._record_page_failure(token_label, size, started, pages)
                 last_error = RuntimeError("Failed to decode GraphQL JSON")
                 if fallback_available:
                     continue
@@ -210,6 +270,14 @@ class InstagramScraper:
 
             errors = data.get("errors")
             if errors:
+                # Errors next to partial data usually mean the page ran too long.
+                self._record_page_failure(
+                    token_label,
+                    size,
+                    started,
+                    pages,
+                    size_related=bool(data.get("data")),
+                )
                 last_error = RuntimeError(
                     f"Instagram GraphQL returned errors ({token_label}={token_value})"
                 )
@@ -217,8 +285,10 @@ class InstagramScraper:
                     continue
                 raise last_error
 
-            media = extract_media_connection(data, prefer_xdt=prefer_xdt)
+            with self.tracer.span("parse.extract_media_connection"):
+                media = extract_media_connection(data, prefer_xdt=prefer_xdt)
             if not media:
+                self._record_page_failure(token_label, size, started, pages)
                 last_error = RuntimeError(
                     f"Unexpected GraphQL payload shape ({token_label}={token_value})"
                 )
@@ -227,10 +297,21 @@ class InstagramScraper:
                 raise last_error
 
             edges = media.get("edges", [])
-            normalized = [
-                normalize_post_node(edge.get("node", {}))
-                for edge in edges
-            ]
+            self._archive_edges(username, edges)
+            pages.append(
+                self.page_sizer.record(
+                    token_label,
+                    requested=size,
+                    elapsed=self._page_elapsed(resp, started),
+                    payload_bytes=len(resp.content or b""),
+                    returned=len(edges),
+                )
+            )
+            with self.tracer.span("parse.normalize_posts", count=len(edges)):
+                normalized = [
+                    normalize_post_node(edge.get("node", {}), self.media_policy)
+                    for edge in edges
+                ]
 
             page_info = media.get("page_info", {}) or {}
             return normalized, page_info
@@ -239,12 +320,17 @@ class InstagramScraper:
             raise last_error
         raise RuntimeError("Unable to fetch posts page via GraphQL")
 
+    @traced("scraper.scrape_posts")
     def scrape_posts(
         self,
         username: str,
         min_count: int = 50,
         user_data: Dict[str, Any] | None = None,
+        pages: List[Dict[str, Any]] | None = None,
     ) -> List[Dict[str, Any]]:
+        """Collect at least ``min_count`` posts; GraphQL page logs go to ``pages``."""
+        if pages is None:
+            pages = []
         if min_count <= 0:
             return []
 
@@ -256,9 +342,11 @@ class InstagramScraper:
 
         timeline = user_data.get("edge_owner_to_timeline_media") or {}
         edges = timeline.get("edges") or []
+        self._archive_edges(username, edges)
 
         posts = [
-            normalize_post_node(edge.get("node", {})) for edge in edges
+            normalize_post_node(edge.get("node", {}), self.media_policy)
+            for edge in edges
         ]
 
         page_info = timeline.get("page_info") or {}
@@ -266,8 +354,11 @@ class InstagramScraper:
         after = page_info.get("end_cursor")
         user_id = user_data.get("id")
 
+        retries = 0
+
         while has_next and user_id and len(posts) < min_count:
-            batch_size = min(MAX_GRAPHQL_PAGE_SIZE, max(1, min_count - len(posts)))
+            # Remaining posts; the page sizer applies its own bounds.
+            batch_size = max(1, min_count - len(posts))
 
             try:
                 page_posts, page_info = self.fetch_posts_page(
@@ -275,20 +366,36 @@ class InstagramScraper:
                     user_id=user_id,
                     after=after,
                     batch_size=batch_size,
+                    pages=pages,
                 )
             except Exception:
-                break
-
+                # Only size-related failures shrink the page; retry smaller.
+                last = pages[-1] if pages else {}
+                shrunk = last.get("error") and last["next_batch_size"] < last["batch_size"]
+                if retries >= MAX_PAGE_RETRIES or not shrunk:
+                    break
+                retries += 1
+                continue
+
+            retries = 0
             posts.extend(page_posts)
             has_next = page_info.get("has_next_page", False)
             after = page_info.get("end_cursor")
 
         return posts[:min_count]
 
+    @traced("scraper.scrape")
     def scrape(self, username: str, min_posts: int = 50) -> Dict[str, Any]:
+        current_span().set(username=username, min_posts=min_posts)
+        if self.raw_archive:
+            self.raw_archive.start_run()
         profile, user_data = self.scrape_profile(username)
-        posts = self.scrape_posts(username, min_posts, user_data=user_data)
+        if self.raw_archive and user_data:
+            self.raw_archive.write_user(username, user_data)
+        pages: List[Dict[str, Any]] = []
+        posts = self.scrape_posts(username, min_posts, user_data=user_data, pages=pages)
         return {
             "profile": profile,
             "posts": posts,
+            "metadata": self.page_sizer.metadata(pages),
         }
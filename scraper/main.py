@@ -12,8 +12,15 @@ def main() -> None:
     username = sys.argv[1]
     scraper = InstagramScraper()
 
-    result = scraper.scrape(username, min_posts=50)
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    settings = scraper.settings
+
+    try:
+        result = scraper.scrape(username, min_posts=50)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    finally:
+        # Export even when the scrape fails; that is when the trace matters most.
+        if settings.trace_file and scraper.tracer.enabled:
+            scraper.tracer.export(settings.trace_file, fmt=settings.trace_format)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,171 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List
+
+DEFAULT_MIN_PAGE_SIZE = 12
+DEFAULT_MAX_PAGE_SIZE = 50
+
+
+@dataclass(frozen=True)
+class PageSizingConfig:
+    min_size: int = DEFAULT_MIN_PAGE_SIZE
+    max_size: int = DEFAULT_MAX_PAGE_SIZE
+    initial_size: int | None = None
+    target_latency: float = 3.0
+    max_payload_bytes: int = 2_000_000
+    increase_step: int = 6
+    decrease_factor: float = 0.7
+    ewma_alpha: float = 0.3
+    max_error_rate: float = 0.2
+    probe_interval: int = 50
+
+    def __post_init__(self) -> None:
+        if self.min_size < 1 or self.max_size < self.min_size:
+            raise ValueError(
+                f"Invalid page size bounds: min={self.min_size}, max={self.max_size}"
+            )
+        if not 0 < self.decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+
+    def clamp(self, size: float) -> int:
+        return max(self.min_size, min(self.max_size, int(size)))
+
+
+@dataclass
+class StrategyStats:
+    size: int
+    seconds_per_item: float | None = None
+    bytes_per_item: float | None = None
+    error_rate: float = 0.0
+    ceiling: int | None = None
+    successes: int = 0
+    requests: int = 0
+    errors: int = 0
+
+
+class AdaptivePageSizer:
+    """Tunes GraphQL ``batch_size`` per pagination strategy.
+
+    Additive increase while pages come back fast, small and error free;
+    multiplicative decrease on errors, and a step down to the largest size
+    that fits the latency/payload targets when responses are too slow or big.
+    Latency and payload are tracked per requested item, so a short final page
+    does not look artificially fast and estimates carry over between sizes.
+    A failed size becomes a ceiling that is only re-probed slowly, raised by
+    one item every ``probe_interval`` successful pages. Failures recorded with
+    ``size_related=False`` (auth, rate limits, a rotated ``doc_id``) are
+    counted but leave the size alone.
+
+    ``record`` returns a log entry for the page; callers keep those per scrape
+    and pass them to ``metadata``, so concurrent scrapes sharing a sizer do not
+    mix their page logs.
+    """
+
+    def __init__(
+        self,
+        config: PageSizingConfig | None = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.config = config or PageSizingConfig()
+        self.clock = clock
+        self._stats: Dict[str, StrategyStats] = {}
+
+    def stats(self, strategy: str) -> StrategyStats:
+        stats = self._stats.get(strategy)
+        if stats is None:
+            initial = self.config.initial_size or self.config.max_size
+            stats = StrategyStats(size=self.config.clamp(initial))
+            self._stats[strategy] = stats
+        return stats
+
+    def next_size(self, strategy: str, remaining: int | None = None) -> int:
+        size = self.stats(strategy).size
+        if remaining is not None:
+            size = min(size, max(1, remaining))
+        return size
+
+    def _ewma(self, previous: float | None, sample: float) -> float:
+        if previous is None:
+            return sample
+        alpha = self.config.ewma_alpha
+        return alpha * sample + (1 - alpha) * previous
+
+    def _fits(self, stats: StrategyStats, size: int) -> bool:
+        seconds = (stats.seconds_per_item or 0.0) * size
+        payload = (stats.bytes_per_item or 0.0) * size
+        return (
+            seconds <= self.config.target_latency
+            and payload <= self.config.max_payload_bytes
+        )
+
+    def _largest_fitting(self, stats: StrategyStats) -> float:
+        limits = [float(stats.size - 1)]
+        if stats.seconds_per_item:
+            limits.append(self.config.target_latency / stats.seconds_per_item)
+        if stats.bytes_per_item:
+            limits.append(self.config.max_payload_bytes / stats.bytes_per_item)
+        return min(limits)
+
+    def record(
+        self,
+        strategy: str,
+        requested: int,
+        elapsed: float,
+        payload_bytes: int = 0,
+        returned: int = 0,
+        error: bool = False,
+        size_related: bool = True,
+    ) -> Dict[str, Any]:
+        config = self.config
+        stats = self.stats(strategy)
+        stats.requests += 1
+
+        if error:
+            stats.errors += 1
+            new_size = stats.size
+            if size_related:
+                stats.error_rate = self._ewma(stats.error_rate, 1.0)
+                # A short final page failing says nothing about the full size.
+                if requested == stats.size:
+                    stats.ceiling = max(config.min_size, requested - 1)
+                stats.successes = 0
+                new_size = stats.size * config.decrease_factor
+        else:
+            stats.error_rate = self._ewma(stats.error_rate, 0.0)
+            stats.successes += 1
+            if stats.ceiling is not None and stats.successes % config.probe_interval == 0:
+                stats.ceiling += 1
+            items = max(1, requested)
+            stats.seconds_per_item = self._ewma(stats.seconds_per_item, elapsed / items)
+            stats.bytes_per_item = self._ewma(stats.bytes_per_item, payload_bytes / items)
+            if not self._fits(stats, stats.size):
+                new_size = self._largest_fitting(stats)
+            elif (
+                stats.error_rate <= config.max_error_rate
+                and self._fits(stats, stats.size + config.increase_step)
+            ):
+                new_size = stats.size + config.increase_step
+                if stats.ceiling is not None:
+                    new_size = max(stats.size, min(new_size, stats.ceiling))
+            else:
+                new_size = stats.size
+        stats.size = config.clamp(new_size)
+
+        return {
+            "strategy": strategy,
+            "batch_size": requested,
+            "returned": returned,
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "payload_bytes": payload_bytes,
+            "error": error,
+            "next_batch_size": stats.size,
+        }
+
+    @staticmethod
+    def metadata(pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "graphql_pages": list(pages),
+            "graphql_page_sizes": {
+                page["strategy"]: page["next_batch_size"] for page in pages
+            },
+        }
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from typing import Any, Dict, List, Tuple
 
 MEDIA_TYPE_MAP = {
@@ -24,6 +25,34 @@ NUMERIC_MEDIA_MAP = {
 }
 
 
+@dataclass(frozen=True)
+class MediaPolicy:
+    """Which media URLs ``extract_media_urls`` keeps for each post item.
+
+    ``best_only`` keeps the largest image candidate and largest video version
+    of every item, ``max_per_item`` caps the URLs per item (video URLs are
+    kept ahead of images, so a video item keeps its video), and
+    ``enabled=False`` skips media extraction for metadata-only crawls.
+    """
+
+    enabled: bool = True
+    best_only: bool = False
+    max_per_item: int | None = None
+    images: bool = True
+    videos: bool = True
+
+    def __post_init__(self) -> None:
+        if self.max_per_item is not None and self.max_per_item < 0:
+            raise ValueError(f"max_per_item must be >= 0, got {self.max_per_item}")
+        if self.enabled and not (self.images or self.videos):
+            raise ValueError("MediaPolicy needs images or videos; use NO_MEDIA to skip media")
+
+
+ALL_MEDIA = MediaPolicy()
+BEST_MEDIA = MediaPolicy(best_only=True)
+NO_MEDIA = MediaPolicy(enabled=False)
+
+
 def extract_caption(node: Dict[str, Any]) -> str | None:
     caption_obj = node.get("caption")
     if isinstance(caption_obj, dict):
@@ -39,43 +68,96 @@ def extract_caption(node: Dict[str, Any]) -> str | None:
     return None
 
 
-def _extend_from_versions(media: Dict[str, Any], urls: List[str]) -> None:
-    img = media.get("image_versions2") or {}
-    for cand in img.get("candidates", []):
-        url = cand.get("url")
+def _largest_url(versions: List[Dict[str, Any]]) -> str | None:
+    # Widths alone rank candidates of one item; they share an aspect ratio.
+    best_url = None
+    best_width = -1
+    for version in versions:
+        width = version.get("width") or 0
+        if width > best_width:
+            url = version.get("url")
+            if url:
+                best_url, best_width = url, width
+    return best_url
+
+
+def _append_version_urls(
+    versions: List[Dict[str, Any]],
+    urls: List[str],
+    best_only: bool,
+) -> None:
+    if best_only:
+        url = _largest_url(versions)
         if url:
             urls.append(url)
-
-    for video in media.get("video_versions") or []:
-        url = video.get("url")
+        return
+    for version in versions:
+        url = version.get("url")
         if url:
             urls.append(url)
 
 
-def extract_media_urls(node: Dict[str, Any]) -> List[str]:
+def _extend_from_versions(
+    media: Dict[str, Any],
+    urls: List[str],
+    policy: MediaPolicy = ALL_MEDIA,
+) -> None:
+    start = len(urls)
+    images = videos = None
+    if policy.images:
+        images = (media.get("image_versions2") or {}).get("candidates") or []
+    if policy.videos:
+        videos = media.get("video_versions") or []
+
+    if policy.max_per_item is None:
+        if images:
+            _append_version_urls(images, urls, policy.best_only)
+        if videos:
+            _append_version_urls(videos, urls, policy.best_only)
+        return
+
+    # Videos first, so the cap keeps the video rather than its cover frame.
+    if videos:
+        _append_version_urls(videos, urls, policy.best_only)
+    if images and len(urls) - start < policy.max_per_item:
+        _append_version_urls(images, urls, policy.best_only)
+    del urls[start + policy.max_per_item :]
+
+
+def _legacy_media_url(node: Dict[str, Any], policy: MediaPolicy) -> str | None:
+    video_url = node.get("video_url") if policy.videos else None
+    display_url = node.get("display_url") if policy.images else None
+    return video_url or display_url
+
+
+def extract_media_urls(
+    node: Dict[str, Any],
+    policy: MediaPolicy = ALL_MEDIA,
+) -> List[str]:
     urls: List[str] = []
+    if not policy.enabled or policy.max_per_item == 0:
+        return urls
 
     carousel = node.get("carousel_media")
     if isinstance(carousel, list) and carousel:
         for item in carousel:
             if isinstance(item, dict):
-                _extend_from_versions(item, urls)
+                _extend_from_versions(item, urls, policy)
         if urls:
             return urls
 
-    _extend_from_versions(node, urls)
+    _extend_from_versions(node, urls, policy)
     if urls:
         return urls
 
     typename = node.get("__typename") or node.get("media_type")
     if typename == "GraphSidecar" and node.get("edge_sidecar_to_children"):
         for child in node["edge_sidecar_to_children"].get("edges", []):
-            child_node = child.get("node", {})
-            media_url = child_node.get("video_url") or child_node.get("display_url")
+            media_url = _legacy_media_url(child.get("node", {}), policy)
             if media_url:
                 urls.append(media_url)
     else:
-        media_url = node.get("video_url") or node.get("display_url")
+        media_url = _legacy_media_url(node, policy)
         if media_url:
             urls.append(media_url)
 
@@ -100,7 +182,10 @@ def map_media_type(raw_type: Any) -> str | None:
     return MEDIA_TYPE_MAP.get(typename)
 
 
-def normalize_post_node(node: Dict[str, Any]) -> Dict[str, Any]:
+def normalize_post_node(
+    node: Dict[str, Any],
+    media_policy: MediaPolicy = ALL_MEDIA,
+) -> Dict[str, Any]:
     typename = (
         node.get("__typename")
         or node.get("media_type")
@@ -125,7 +210,7 @@ def normalize_post_node(node: Dict[str, Any]) -> Dict[str, Any]:
         or node.get("edge_media_to_comment", {}).get("count"),
         "timestamp": node.get("taken_at") or node.get("taken_at_timestamp"),
         "media_type": map_media_type(typename) or typename,
-        "media_urls": extract_media_urls(node),
+        "media_urls": extract_media_urls(node, media_policy),
         "location": (
             {"id": loc_id, "name": loc_name} if (loc_id or loc_name) else None
         ),
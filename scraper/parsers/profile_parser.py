@@ -44,6 +44,40 @@ def extract_user_object(data: Dict[str, Any]) -> Dict[str, Any]:
     raise ProfileParseError("Could not locate user object in JSON")
 
 
+def normalize_user(user: Dict[str, Any]) -> Dict[str, Any]:
+    follower_count = user.get("edge_followed_by", {}).get("count")
+    following_count = user.get("edge_follow", {}).get("count")
+    posts_count = user.get("edge_owner_to_timeline_media", {}).get("count")
+
+    profile_pic_url = (
+        user.get("profile_pic_url_hd")
+        or user.get("profile_pic_url")
+        or None
+    )
+
+    category = (
+        user.get("category_name")
+        or user.get("business_category_name")
+        or user.get("category_enum")
+    )
+
+    biography = user.get("biography") or user.get("bio")
+
+    return {
+        "username": user.get("username"),
+        "full_name": user.get("full_name"),
+        "biography": biography,
+        "follower_count": follower_count,
+        "following_count": following_count,
+        "posts_count": posts_count,
+        "profile_picture_url": profile_pic_url,
+        "is_verified": bool(user.get("is_verified")),
+        "category": category,
+        "external_url": user.get("external_url"),
+        "id": user.get("id"),
+    }
+
+
 def parse_profile(html: str, username: str) -> Dict[str, Any]:
     soup = BeautifulSoup(html, "lxml")
 
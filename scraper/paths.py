@@ -0,0 +1,9 @@
+import re
+
+# Instagram handles: letters, digits, "_" and "."; never a path separator,
+# so they are safe to use as file and directory names.
+USERNAME_PATTERN = re.compile(r"[A-Za-z0-9_][A-Za-z0-9._]{0,63}")
+
+
+def is_safe_username(username: str | None) -> bool:
+    return bool(username) and USERNAME_PATTERN.fullmatch(username) is not None
@@ -0,0 +1,139 @@
+import gzip
+import json
+import os
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .parsers.post_parser import normalize_post_node
+from .parsers.profile_parser import normalize_user
+from .paths import is_safe_username
+
+ARCHIVE_SUFFIX = ".jsonl.gz"
+PROFILE_KIND = "profile"
+POSTS_KIND = "posts"
+
+DEFAULT_PROJECTIONS: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+    PROFILE_KIND: normalize_user,
+    POSTS_KIND: normalize_post_node,
+}
+
+
+class RawArchiveError(Exception):
+    pass
+
+
+def new_run_id() -> str:
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{secrets.token_hex(4)}"
+
+
+class RawArchive:
+    """Writes raw ``user`` dicts and GraphQL ``node``s as they are scraped.
+
+    Pages go to ``<root>/<username>/<run_id>.jsonl.gz``, each appended as its
+    own gzip member holding a single JSON line, so readers can stream the
+    file page by page. ``InstagramScraper.scrape`` calls ``start_run`` for
+    every scrape, so each scrape of an account becomes its own file.
+    """
+
+    def __init__(self, root: str, run_id: Optional[str] = None) -> None:
+        self.root = root
+        self.run_id = run_id or new_run_id()
+        os.makedirs(self.root, exist_ok=True)
+
+    def start_run(self, run_id: Optional[str] = None) -> str:
+        self.run_id = run_id or new_run_id()
+        return self.run_id
+
+    def path_for(self, username: str) -> str:
+        if not is_safe_username(username):
+            raise RawArchiveError(f"Invalid username for raw archive: {username!r}")
+        return os.path.join(self.root, username, f"{self.run_id}{ARCHIVE_SUFFIX}")
+
+    def write_page(
+        self,
+        username: str,
+        kind: str,
+        nodes: List[Dict[str, Any]],
+    ) -> None:
+        if not nodes:
+            return
+        path = self.path_for(username)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        page = {
+            "username": username,
+            "kind": kind,
+            "fetched_at": int(time.time()),
+            "nodes": nodes,
+        }
+        line = json.dumps(page, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with gzip.open(path, "ab") as fh:
+            fh.write(line.encode("utf-8"))
+
+    def write_user(self, username: str, user: Dict[str, Any]) -> None:
+        # Timeline edges are archived as a posts page; keep only the counts here.
+        user = dict(user)
+        timeline = user.get("edge_owner_to_timeline_media")
+        if isinstance(timeline, dict):
+            user["edge_owner_to_timeline_media"] = {
+                key: value for key, value in timeline.items() if key != "edges"
+            }
+        self.write_page(username, PROFILE_KIND, [user])
+
+
+def list_archive_files(root: str) -> List[str]:
+    paths: List[str] = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.endswith(ARCHIVE_SUFFIX):
+                paths.append(os.path.join(dirpath, name))
+    return sorted(paths)
+
+
+def iter_pages(path: str) -> Iterator[Dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_nodes(path: str, kind: str = POSTS_KIND) -> Iterator[Dict[str, Any]]:
+    for page in iter_pages(path):
+        if page.get("kind") == kind:
+            yield from page.get("nodes") or []
+
+
+def _project_file(
+    task: Tuple[str, str, Callable[[Dict[str, Any]], Any]],
+) -> Tuple[str, List[Any]]:
+    path, kind, projection = task
+    return path, [projection(node) for node in iter_nodes(path, kind)]
+
+
+def reprocess(
+    root: str,
+    kind: str = POSTS_KIND,
+    projection: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    processes: Optional[int] = None,
+    chunksize: int = 4,
+) -> Iterator[Tuple[str, List[Any]]]:
+    """Re-run normalization (or ``projection``) over an archive, file by file.
+
+    Files are spread across ``processes`` worker processes (CPU count by
+    default; ``1`` runs inline). ``projection`` must be picklable, i.e. a
+    module-level function. Yields ``(path, results)`` in archive order.
+    """
+    if projection is None:
+        projection = DEFAULT_PROJECTIONS.get(kind)
+        if projection is None:
+            raise ValueError(f"No default projection for archive kind {kind!r}")
+
+    tasks = [(path, kind, projection) for path in list_archive_files(root)]
+    if processes == 1:
+        for task in tasks:
+            yield _project_file(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        yield from pool.map(_project_file, tasks, chunksize=chunksize)
@@ -0,0 +1,233 @@
+import heapq
+import math
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Protocol, Tuple
+
+DEFAULT_MIN_POSTS = 12
+INITIAL_PAGE_POSTS = 12
+GRAPHQL_PAGE_SIZE = 50
+
+
+class Scrapes(Protocol):
+    def scrape(self, username: str, min_posts: int = 50) -> Dict[str, Any]:
+        ...
+
+
+@dataclass(frozen=True)
+class SchedulerConfig:
+    min_interval: float = 15 * 60
+    max_interval: float = 7 * 24 * 3600
+    new_posts_per_visit: float = 1.0
+    rate_alpha: float = 0.5
+    min_posts: int = DEFAULT_MIN_POSTS
+    max_posts: int = 50
+
+
+@dataclass
+class AccountActivity:
+    username: str
+    posts_per_second: float | None = None
+    last_scraped: float | None = None
+    posts_count: int | None = None
+    newest_post: float | None = None
+    scrapes: int = 0
+    failures: int = 0
+    retry_at: float | None = None
+
+    def expected_new_posts(self, now: float) -> float:
+        if self.last_scraped is None or self.posts_per_second is None:
+            return math.inf
+        return self.posts_per_second * max(0.0, now - self.last_scraped)
+
+
+class CrawlScheduler:
+    """Orders recurring scrapes by estimated posting activity.
+
+    Each account is due once it is expected to have ``new_posts_per_visit``
+    new posts, clamped to ``[min_interval, max_interval]`` after its last
+    scrape. Due times only move when an account is scraped or a failed
+    scrape is scheduled for a backoff retry, so a min-heap keyed on due time
+    stays valid as the clock advances; stale entries are skipped lazily. New
+    accounts are due immediately. When more accounts are due than the request
+    budget allows, the ones with the most expected new posts (or the longest
+    time since their last scrape) go first, asking for fewer posts if that is
+    all the remaining budget pays for.
+    """
+
+    def __init__(
+        self,
+        scraper: Scrapes,
+        config: SchedulerConfig | None = None,
+    ) -> None:
+        self.scraper = scraper
+        self.config = config or SchedulerConfig()
+        self.accounts: Dict[str, AccountActivity] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq = 0
+
+    def add(self, usernames: Iterable[str]) -> None:
+        for username in usernames:
+            if username not in self.accounts:
+                self.accounts[username] = AccountActivity(username=username)
+                self._push(username, 0.0)
+
+    def _push(self, username: str, due: float) -> None:
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, username))
+
+    def due_at(self, account: AccountActivity) -> float:
+        if account.retry_at is not None:
+            return account.retry_at
+        if account.last_scraped is None:
+            return 0.0
+        config = self.config
+        rate = account.posts_per_second or 0.0
+        interval = config.new_posts_per_visit / rate if rate > 0 else config.max_interval
+        interval = min(config.max_interval, max(config.min_interval, interval))
+        return account.last_scraped + interval
+
+    def posts_to_request(self, account: AccountActivity, now: float) -> int:
+        expected = account.expected_new_posts(now)
+        if math.isinf(expected):
+            return self.config.max_posts
+        # Ask for twice the expected count so bursts are not cut off.
+        wanted = math.ceil(2 * expected)
+        return min(self.config.max_posts, max(self.config.min_posts, wanted))
+
+    @staticmethod
+    def estimate_requests(min_posts: int) -> int:
+        extra = max(0, min_posts - INITIAL_PAGE_POSTS)
+        return 1 + math.ceil(extra / GRAPHQL_PAGE_SIZE)
+
+    @staticmethod
+    def posts_for_requests(requests: int) -> int:
+        """Most posts ``estimate_requests`` prices at ``requests`` or fewer."""
+        return INITIAL_PAGE_POSTS + max(0, requests - 1) * GRAPHQL_PAGE_SIZE
+
+    def observe(self, username: str, result: Dict[str, Any], now: float) -> None:
+        account = self.accounts.setdefault(username, AccountActivity(username=username))
+        profile = result.get("profile") or {}
+        timestamps = sorted(
+            float(post["timestamp"])
+            for post in result.get("posts") or []
+            if post.get("timestamp")
+        )
+
+        samples: List[float] = []
+        if len(timestamps) >= 2 and timestamps[-1] > timestamps[0]:
+            # Span from the oldest fetched post up to now, so a quiet stretch
+            # since the last post lowers the rate.
+            samples.append((len(timestamps) - 1) / max(now - timestamps[0], 1.0))
+
+        posts_count = profile.get("posts_count")
+        if (
+            posts_count is not None
+            and account.posts_count is not None
+            and account.last_scraped is not None
+            and now > account.last_scraped
+        ):
+            delta = max(0, posts_count - account.posts_count)
+            samples.append(delta / (now - account.last_scraped))
+
+        if samples:
+            sample = max(samples)
+            if account.posts_per_second is None:
+                account.posts_per_second = sample
+            else:
+                alpha = self.config.rate_alpha
+                account.posts_per_second = (
+                    alpha * sample + (1 - alpha) * account.posts_per_second
+                )
+        elif account.posts_per_second is None:
+            account.posts_per_second = 0.0
+
+        if posts_count is not None:
+            account.posts_count = posts_count
+        if timestamps:
+            account.newest_post = max(account.newest_post or 0.0, timestamps[-1])
+        account.last_scraped = now
+        account.scrapes += 1
+        account.failures = 0
+        account.retry_at = None
+        self._push(username, self.due_at(account))
+
+    def observe_failure(self, username: str, now: float) -> None:
+        """Retry after ``min_interval`` doubled per failure, up to ``max_interval``."""
+        account = self.accounts.setdefault(username, AccountActivity(username=username))
+        account.failures += 1
+        delay = self.config.min_interval * 2 ** (account.failures - 1)
+        account.retry_at = now + min(self.config.max_interval, delay)
+        self._push(username, self.due_at(account))
+
+    def priority(self, account: AccountActivity, now: float) -> float:
+        """Expected new posts, but never below the fraction of ``max_interval`` elapsed."""
+        if account.last_scraped is None:
+            return math.inf
+        staleness = (now - account.last_scraped) / self.config.max_interval
+        return max(account.expected_new_posts(now), staleness)
+
+    def _pop_due(self, now: float) -> List[AccountActivity]:
+        due: Dict[str, AccountActivity] = {}
+        while self._heap and self._heap[0][0] <= now:
+            due_time, _, username = heapq.heappop(self._heap)
+            account = self.accounts[username]
+            if due_time == self.due_at(account):
+                due[username] = account
+        return list(due.values())
+
+    def run(self, budget: int, now: float | None = None) -> List[Dict[str, Any]]:
+        """Scrape due accounts, highest priority first, within ``budget`` requests.
+
+        Returns one entry per scrape with the username, requested post count,
+        estimated request cost and whether the scrape failed (it raised, or the
+        profile came back with an ``error``). Due accounts that did not fit
+        stay queued; failed ones are retried after a backoff.
+        """
+        if budget < 1:
+            raise ValueError(f"budget must be at least one request, got {budget}")
+        now = time.time() if now is None else now
+        due = self._pop_due(now)
+        due.sort(key=lambda account: self.priority(account, now), reverse=True)
+
+        spent = 0
+        processed = 0
+        runs: List[Dict[str, Any]] = []
+        try:
+            for account in due:
+                left = budget - spent
+                if left < 1:
+                    self._push(account.username, self.due_at(account))
+                    processed += 1
+                    continue
+                min_posts = min(
+                    self.posts_to_request(account, now), self.posts_for_requests(left)
+                )
+                cost = self.estimate_requests(min_posts)
+
+                spent += cost
+                try:
+                    result = self.scraper.scrape(account.username, min_posts=min_posts)
+                except Exception:
+                    failed = True
+                else:
+                    # scrape() reports an unreachable profile instead of raising.
+                    failed = bool((result.get("profile") or {}).get("error"))
+                if failed:
+                    self.observe_failure(account.username, now)
+                else:
+                    self.observe(account.username, result, now)
+                processed += 1
+                runs.append(
+                    {
+                        "username": account.username,
+                        "min_posts": min_posts,
+                        "requests": cost,
+                        "failed": failed,
+                    }
+                )
+        finally:
+            # Anything popped but not handled (e.g. on KeyboardInterrupt) goes back.
+            for account in due[processed:]:
+                self._push(account.username, self.due_at(account))
+        return runs
@@ -2,6 +2,8 @@ import os
 from dataclasses import dataclass
 from typing import Dict, Optional
 
+from .tracing import TRACE_FORMATS
+
 
 @dataclass(frozen=True)
 class ScraperSettings:
@@ -11,6 +13,19 @@ class ScraperSettings:
     graphql_lsd: Optional[str]
     graphql_doc_id: str
     graphql_query_hash: str
+    cassette_dir: Optional[str] = None
+    cassette_mode: str = "replay"
+    raw_archive_dir: Optional[str] = None
+    trace_file: Optional[str] = None
+    trace_format: str = "chrome"
+
+    def __post_init__(self) -> None:
+        # Checked up front: Tracer.export only runs after the scrape finishes.
+        if self.trace_format not in TRACE_FORMATS:
+            raise ValueError(
+                f"Unknown IG_TRACE_FORMAT {self.trace_format!r}, "
+                f"expected one of {TRACE_FORMATS}"
+            )
 
     @classmethod
     def from_env(cls) -> "ScraperSettings":
@@ -23,6 +38,11 @@ class ScraperSettings:
             graphql_query_hash=os.getenv(
                 "IG_GRAPHQL_QUERY_HASH", "8c2a529969ee035a5063f2fc8602a0fd"
             ),
+            cassette_dir=os.getenv("IG_CASSETTE_DIR"),
+            cassette_mode=os.getenv("IG_CASSETTE_MODE", "replay"),
+            raw_archive_dir=os.getenv("IG_RAW_ARCHIVE_DIR"),
+            trace_file=os.getenv("IG_TRACE_FILE"),
+            trace_format=os.getenv("IG_TRACE_FORMAT", "chrome"),
         )
 
     def common_headers(self) -> Dict[str, str]:
@@ -0,0 +1,535 @@
+import json
+import os
+import time
+import zlib
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from .paths import is_safe_username
+
+TRACKED_FIELDS = ("follower_count", "following_count", "posts_count")
+SHARD_PREFIX = "shard-"
+SHARD_SUFFIX = ".npz"
+STORE_META_FILENAME = "store.json"
+DEFAULT_SHARDS = 64
+DEFAULT_MAX_SEGMENTS = 8
+
+
+class SnapshotStoreError(Exception):
+    pass
+
+
+def _empty_series() -> Tuple[np.ndarray, np.ndarray]:
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+
+def _sample_series(
+    times: np.ndarray, values: np.ndarray, points: np.ndarray
+) -> np.ndarray:
+    row = np.full(len(points), np.nan, dtype=np.float64)
+    if len(times):
+        idx = np.searchsorted(times, points, side="right") - 1
+        known = idx >= 0
+        row[known] = values[idx[known]]
+    return row
+
+
+@dataclass
+class AccountSnapshots:
+    """Base profile record plus change-only numeric series for one account."""
+
+    base: Dict[str, Any] = field(default_factory=dict)
+    changes: List[Tuple[int, Dict[str, Any]]] = field(default_factory=list)
+    times: Dict[str, array] = field(default_factory=dict)
+    values: Dict[str, array] = field(default_factory=dict)
+    last_seen: int | None = None
+    # Points per field already on disk; ``unflushed`` returns the rest.
+    flushed: Dict[str, int] = field(default_factory=dict)
+    meta_changed: bool = False
+
+    def record(self, profile: Dict[str, Any], timestamp: int) -> bool:
+        if self.last_seen is not None and timestamp < self.last_seen:
+            raise SnapshotStoreError(
+                f"Snapshot at {timestamp} is older than last seen {self.last_seen}"
+            )
+        changed = False
+
+        for name in TRACKED_FIELDS:
+            value = profile.get(name)
+            if value is None:
+                continue
+            times = self.times.setdefault(name, array("q"))
+            values = self.values.setdefault(name, array("q"))
+            if values and values[-1] == int(value):
+                continue
+            times.append(timestamp)
+            values.append(int(value))
+            changed = True
+
+        diff = {
+            key: value
+            for key, value in profile.items()
+            if key not in TRACKED_FIELDS and self.current(key) != value
+        }
+        if diff:
+            if not self.base:
+                self.base = dict(diff)
+            else:
+                self.changes.append((timestamp, diff))
+            self.meta_changed = True
+            changed = True
+
+        self.last_seen = timestamp
+        return changed
+
+    def current(self, key: str) -> Any:
+        for _, diff in reversed(self.changes):
+            if key in diff:
+                return diff[key]
+        return self.base.get(key)
+
+    def latest_profile(self) -> Dict[str, Any]:
+        profile = dict(self.base)
+        for _, diff in self.changes:
+            profile.update(diff)
+        for name in TRACKED_FIELDS:
+            values = self.values.get(name)
+            profile[name] = values[-1] if values else None
+        return profile
+
+    def series(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        # Copies: views would pin the array buffers and block further appends.
+        times = self.times.get(name)
+        if not times:
+            return _empty_series()
+        return (
+            np.array(times, dtype=np.int64),
+            np.array(self.values[name], dtype=np.int64),
+        )
+
+    def unflushed(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        start = self.flushed.get(name, 0)
+        times = self.times.get(name)
+        if not times or len(times) <= start:
+            return _empty_series()
+        return (
+            np.array(times[start:], dtype=np.int64),
+            np.array(self.values[name][start:], dtype=np.int64),
+        )
+
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "base": self.base,
+            "changes": self.changes,
+            "last_seen": self.last_seen,
+        }
+
+    @classmethod
+    def from_meta(cls, meta: Dict[str, Any]) -> "AccountSnapshots":
+        return cls(
+            base=meta.get("base") or {},
+            changes=[(int(ts), diff) for ts, diff in meta.get("changes") or []],
+            last_seen=meta.get("last_seen"),
+        )
+
+
+class SnapshotShard:
+    """Counter series and metadata of the accounts in one shard file.
+
+    Per tracked field, the series of every account are stored back to back
+    in one int64 array with an offsets array marking where each account
+    starts. On disk the fields are concatenated too and delta-encoded, so a
+    file is five arrays and decodes with one ``np.cumsum`` for times and one
+    for values. A shard's base file and
+    its segments are each loaded as a ``SnapshotShard`` and combined with
+    ``merge``; ``through`` is the last segment folded into a base file.
+    """
+
+    def __init__(
+        self,
+        usernames: List[str],
+        meta: Dict[str, Dict[str, Any]],
+        offsets: Dict[str, np.ndarray],
+        times: Dict[str, np.ndarray],
+        values: Dict[str, np.ndarray],
+        through: int = 0,
+    ) -> None:
+        self.usernames = usernames
+        self.index = {username: idx for idx, username in enumerate(usernames)}
+        self.meta = meta
+        self.offsets = offsets
+        self.times = times
+        self.values = values
+        self.through = through
+
+    @classmethod
+    def empty(cls) -> "SnapshotShard":
+        return cls.from_accounts({})
+
+    @classmethod
+    def from_accounts(cls, accounts: Dict[str, AccountSnapshots]) -> "SnapshotShard":
+        """Points of ``accounts`` not yet written to disk, plus changed metadata."""
+        usernames = sorted(accounts)
+        meta = {
+            username: accounts[username].meta()
+            for username in usernames
+            if accounts[username].meta_changed
+        }
+        offsets, times, values = {}, {}, {}
+        for name in TRACKED_FIELDS:
+            series = [accounts[username].unflushed(name) for username in usernames]
+            lengths = [len(t) for t, _ in series]
+            empty_times, empty_values = _empty_series()
+            times[name] = np.concatenate([t for t, _ in series] or [empty_times])
+            values[name] = np.concatenate([v for _, v in series] or [empty_values])
+            offsets[name] = np.concatenate(
+                ([0], np.cumsum(lengths, dtype=np.int64))
+            ).astype(np.int64)
+        return cls(usernames, meta, offsets, times, values)
+
+    @classmethod
+    def load(cls, path: str) -> "SnapshotShard":
+        with np.load(path, allow_pickle=False) as arrays:
+            usernames = [str(name) for name in arrays["usernames"]]
+            header = json.loads(bytes(arrays["meta"]).decode("utf-8"))
+            all_offsets = arrays["offsets"]
+            all_times = np.cumsum(arrays["dt"], dtype=np.int64)
+            all_values = np.cumsum(arrays["dv"], dtype=np.int64)
+
+        bounds = np.concatenate(([0], np.cumsum(all_offsets[:, -1])))
+        offsets, times, values = {}, {}, {}
+        for idx, name in enumerate(TRACKED_FIELDS):
+            start, end = bounds[idx], bounds[idx + 1]
+            offsets[name] = all_offsets[idx]
+            times[name] = all_times[start:end]
+            values[name] = all_values[start:end]
+        return cls(
+            usernames, header["accounts"], offsets, times, values, header["through"]
+        )
+
+    @classmethod
+    def merge(cls, parts: List["SnapshotShard"]) -> "SnapshotShard":
+        """Combine a base and its segments, oldest first, into one shard."""
+        if len(parts) == 1:
+            return parts[0]
+        usernames = sorted(set().union(*(part.usernames for part in parts)))
+        index = {username: idx for idx, username in enumerate(usernames)}
+        meta: Dict[str, Dict[str, Any]] = {}
+        for part in parts:
+            meta.update(part.meta)
+
+        offsets, times, values = {}, {}, {}
+        for name in TRACKED_FIELDS:
+            owners = [
+                np.repeat(
+                    np.array([index[u] for u in part.usernames], dtype=np.int64),
+                    np.diff(part.offsets[name]),
+                )
+                for part in parts
+            ]
+            owner = np.concatenate(owners)
+            # Stable, so each account's points keep their part (= time) order.
+            order = np.argsort(owner, kind="stable")
+            times[name] = np.concatenate([part.times[name] for part in parts])[order]
+            values[name] = np.concatenate([part.values[name] for part in parts])[order]
+            counts = np.bincount(owner, minlength=len(usernames))
+            offsets[name] = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return cls(usernames, meta, offsets, times, values, parts[0].through)
+
+    def series(self, username: str, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        idx = self.index.get(username)
+        if idx is None:
+            return _empty_series()
+        start, end = self.offsets[name][idx], self.offsets[name][idx + 1]
+        return self.times[name][start:end], self.values[name][start:end]
+
+    def account(self, username: str) -> AccountSnapshots | None:
+        if username not in self.index:
+            return None
+        snapshots = AccountSnapshots.from_meta(self.meta.get(username) or {})
+        for name in TRACKED_FIELDS:
+            times, values = self.series(username, name)
+            if len(times):
+                snapshots.times[name] = array("q", times.tobytes())
+                snapshots.values[name] = array("q", values.tobytes())
+                # Metadata is only rewritten with a field change, not every point.
+                snapshots.last_seen = max(snapshots.last_seen or 0, int(times[-1]))
+            snapshots.flushed[name] = len(times)
+        return snapshots
+
+    def sample(self, usernames: List[str], name: str, points: np.ndarray) -> np.ndarray:
+        """``ProfileSnapshotStore.sample`` for accounts of this shard."""
+        result = np.full((len(usernames), len(points)), np.nan, dtype=np.float64)
+        times, values, offsets = self.times[name], self.values[name], self.offsets[name]
+        ids = np.array([self.index.get(u, -1) for u in usernames], dtype=np.int64)
+        present = ids >= 0
+        if not len(times) or not len(points) or not present.any():
+            return result
+
+        # Offset every account's times into its own disjoint key range so one
+        # searchsorted over the concatenation answers all accounts at once.
+        low = min(int(times.min()), int(points.min())) - 1
+        span = max(int(times.max()), int(points.max())) - low + 1
+        if span * len(self.usernames) >= np.iinfo(np.int64).max:
+            for row in np.flatnonzero(present):
+                result[row] = _sample_series(*self.series(usernames[row], name), points)
+            return result
+
+        accounts = np.arange(len(self.usernames), dtype=np.int64)
+        owner = np.repeat(accounts, np.diff(offsets))
+        keys = owner * span + (times - low)
+        rows = ids[present]
+        queries = rows[:, None] * span + (points - low)[None, :]
+        pos = np.searchsorted(keys, queries, side="right") - 1
+        known = pos >= offsets[rows][:, None]
+        result[present] = np.where(known, values[np.maximum(pos, 0)], np.nan)
+        return result
+
+    def write(self, path: str) -> None:
+        header = {"through": self.through, "accounts": self.meta}
+        times = np.concatenate([self.times[name] for name in TRACKED_FIELDS])
+        values = np.concatenate([self.values[name] for name in TRACKED_FIELDS])
+        arrays = {
+            "usernames": np.array(self.usernames, dtype=str),
+            "meta": np.frombuffer(
+                json.dumps(header, ensure_ascii=False).encode("utf-8"),
+                dtype=np.uint8,
+            ),
+            "offsets": np.stack([self.offsets[name] for name in TRACKED_FIELDS]),
+            "dt": np.diff(times, prepend=0),
+            "dv": np.diff(values, prepend=0),
+        }
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            np.savez_compressed(fh, **arrays)
+        os.replace(tmp_path, path)
+
+
+class ProfileSnapshotStore:
+    """Keeps repeated profile scrapes as a base record plus delta-encoded series.
+
+    Only fields that changed since the previous snapshot are kept. Accounts
+    are hashed into a fixed number of shards, each a compressed ``.npz`` base
+    file holding the concatenated counter series of all its accounts, so bulk
+    queries read a few files rather than one per account. ``flush`` appends
+    only new points, as one segment file per changed shard; once a shard has
+    more than ``max_segments`` segments they are compacted into its base.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        shards: int = DEFAULT_SHARDS,
+        max_segments: int = DEFAULT_MAX_SEGMENTS,
+    ) -> None:
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+        self.shards = self._load_shard_count(shards)
+        self.max_segments = max_segments
+        self._segments = self._list_segments()
+        self._shards: Dict[int, SnapshotShard] = {}
+        self._accounts: Dict[str, AccountSnapshots] = {}
+        self._dirty: set[str] = set()
+
+    def _load_shard_count(self, shards: int) -> int:
+        path = os.path.join(self.root, STORE_META_FILENAME)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as fh:
+                return int(json.load(fh)["shards"])
+        if shards < 1:
+            raise SnapshotStoreError(f"Shard count must be positive, got {shards}")
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump({"shards": shards}, fh)
+        return shards
+
+    def _list_segments(self) -> Dict[int, List[int]]:
+        segments: Dict[int, List[int]] = {}
+        for filename in os.listdir(self.root):
+            if not filename.startswith(SHARD_PREFIX) or not filename.endswith(
+                SHARD_SUFFIX
+            ):
+                continue
+            stem = filename[len(SHARD_PREFIX) : -len(SHARD_SUFFIX)]
+            shard_id, _, seq = stem.partition("-")
+            if seq:
+                segments.setdefault(int(shard_id), []).append(int(seq))
+        for seqs in segments.values():
+            seqs.sort()
+        return segments
+
+    def _shard_id(self, username: str) -> int:
+        return zlib.crc32(username.encode("utf-8")) % self.shards
+
+    def _shard_path(self, shard_id: int) -> str:
+        return os.path.join(self.root, f"{SHARD_PREFIX}{shard_id:04d}{SHARD_SUFFIX}")
+
+    def _segment_path(self, shard_id: int, seq: int) -> str:
+        return os.path.join(
+            self.root, f"{SHARD_PREFIX}{shard_id:04d}-{seq:06d}{SHARD_SUFFIX}"
+        )
+
+    def _shard(self, shard_id: int) -> SnapshotShard:
+        shard = self._shards.get(shard_id)
+        if shard is None:
+            path = self._shard_path(shard_id)
+            if os.path.exists(path):
+                base = SnapshotShard.load(path)
+            else:
+                base = SnapshotShard.empty()
+            # Segments up to ``through`` were compacted before a crash removed them.
+            parts = [base] + [
+                SnapshotShard.load(self._segment_path(shard_id, seq))
+                for seq in self._segments.get(shard_id, [])
+                if seq > base.through
+            ]
+            shard = SnapshotShard.merge(parts)
+            self._shards[shard_id] = shard
+        return shard
+
+    def _account(self, username: str) -> AccountSnapshots | None:
+        snapshots = self._accounts.get(username)
+        if snapshots is None:
+            snapshots = self._shard(self._shard_id(username)).account(username)
+        return snapshots
+
+    def _series(self, username: str, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        snapshots = self._accounts.get(username)
+        if snapshots is not None:
+            return snapshots.series(name)
+        return self._shard(self._shard_id(username)).series(username, name)
+
+    def usernames(self) -> List[str]:
+        names = set(self._accounts)
+        for shard_id in range(self.shards):
+            if shard_id in self._segments or os.path.exists(self._shard_path(shard_id)):
+                names.update(self._shard(shard_id).usernames)
+        return sorted(names)
+
+    def record(self, profile: Dict[str, Any], timestamp: int | None = None) -> bool:
+        """Record a normalized profile; returns True if anything changed."""
+        username = profile.get("username")
+        if not is_safe_username(username):
+            raise SnapshotStoreError(f"Invalid username for snapshot: {username!r}")
+        if profile.get("error"):
+            return False
+
+        ts = int(time.time()) if timestamp is None else int(timestamp)
+        snapshots = self._accounts.get(username)
+        if snapshots is None:
+            snapshots = self._account(username) or AccountSnapshots()
+            self._accounts[username] = snapshots
+
+        changed = snapshots.record(profile, ts)
+        if changed:
+            self._dirty.add(username)
+        return changed
+
+    def flush(self) -> int:
+        """Write new points as one segment per changed shard; returns shards written."""
+        by_shard: Dict[int, Dict[str, AccountSnapshots]] = {}
+        for username in self._dirty:
+            by_shard.setdefault(self._shard_id(username), {})[username] = (
+                self._accounts.pop(username)
+            )
+
+        for shard_id, accounts in sorted(by_shard.items()):
+            shard = self._shard(shard_id)
+            segments = self._segments.setdefault(shard_id, [])
+            seq = max([shard.through, *segments]) + 1
+            segment = SnapshotShard.from_accounts(accounts)
+            segment.write(self._segment_path(shard_id, seq))
+            segments.append(seq)
+            self._shards[shard_id] = SnapshotShard.merge([shard, segment])
+            if len(segments) > self.max_segments:
+                self._compact(shard_id)
+
+        self._dirty.clear()
+        return len(by_shard)
+
+    def _compact(self, shard_id: int) -> None:
+        segments = self._segments.pop(shard_id, [])
+        if not segments:
+            return
+        shard = self._shard(shard_id)
+        shard.through = segments[-1]
+        shard.write(self._shard_path(shard_id))
+        for seq in segments:
+            os.remove(self._segment_path(shard_id, seq))
+
+    def compact(self) -> None:
+        """Fold every shard's segments into its base file."""
+        for shard_id in sorted(self._segments):
+            self._compact(shard_id)
+
+    def latest(self, username: str) -> Dict[str, Any] | None:
+        snapshots = self._account(username)
+        return snapshots.latest_profile() if snapshots else None
+
+    def history(
+        self,
+        username: str,
+        field_name: str,
+        start: int | None = None,
+        end: int | None = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Change points for one account within ``[start, end]``.
+
+        The first returned point is the value in effect at ``start`` (with its
+        timestamp clamped to ``start``) so the series can be read as a step
+        function over the whole range.
+        """
+        if field_name not in TRACKED_FIELDS:
+            raise SnapshotStoreError(f"Field {field_name!r} is not tracked")
+
+        times, values = self._series(username, field_name)
+        lo = 0
+        if start is not None:
+            lo = max(0, int(np.searchsorted(times, start, side="right")) - 1)
+        hi = len(times)
+        if end is not None:
+            hi = int(np.searchsorted(times, end, side="right"))
+        if hi <= lo:
+            return _empty_series()
+
+        times = times[lo:hi].copy()
+        if start is not None and times[0] < start:
+            times[0] = start
+        return times, values[lo:hi].copy()
+
+    def sample(
+        self,
+        usernames: Iterable[str],
+        field_name: str,
+        at: Iterable[int] | np.ndarray,
+    ) -> np.ndarray:
+        """Values of ``field_name`` for each account at each timestamp.
+
+        Returns a float64 matrix of shape ``(len(usernames), len(at))`` with
+        NaN where no observation exists yet.
+        """
+        if field_name not in TRACKED_FIELDS:
+            raise SnapshotStoreError(f"Field {field_name!r} is not tracked")
+
+        names = list(usernames)
+        points = np.asarray(at, dtype=np.int64)
+        result = np.full((len(names), len(points)), np.nan, dtype=np.float64)
+
+        by_shard: Dict[int, List[int]] = {}
+        for row, username in enumerate(names):
+            snapshots = self._accounts.get(username)
+            if snapshots is not None:
+                # Not flushed yet, so not part of the shard arrays.
+                result[row] = _sample_series(*snapshots.series(field_name), points)
+            else:
+                by_shard.setdefault(self._shard_id(username), []).append(row)
+
+        for shard_id, rows in by_shard.items():
+            shard = self._shard(shard_id)
+            result[rows] = shard.sample(
+                [names[row] for row in rows], field_name, points
+            )
+        return result
@@ -0,0 +1,224 @@
+import contextvars
+import functools
+import itertools
+import json
+import os
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+TRACE_FORMATS = ("chrome", "otlp")
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def set(self, **attrs: Any) -> None:
+        return None
+
+
+NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    """Default tracer: every span is the same no-op object."""
+
+    enabled = False
+
+    def span(self, name: str, **attrs: Any) -> _NullSpan:
+        return NULL_SPAN
+
+
+NULL_TRACER = NullTracer()
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "scraper_current_span", default=None
+)
+
+
+class Span:
+    __slots__ = (
+        "tracer",
+        "name",
+        "attrs",
+        "span_id",
+        "parent_id",
+        "thread_id",
+        "start_ns",
+        "end_ns",
+        "_token",
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attrs: Dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span_id = next(tracer._ids)
+        self.parent_id: Optional[int] = None
+        self.thread_id = 0
+        self.start_ns = 0
+        self.end_ns = 0
+        self._token: Optional[contextvars.Token] = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "Span":
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.thread_id = threading.get_ident()
+        self._token = _current_span.set(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        if self._token is not None:
+            _current_span.reset(self._token)
+        self.tracer._finish(self)
+
+    @property
+    def duration_ns(self) -> int:
+        return self.end_ns - self.start_ns
+
+
+class Tracer:
+    """Collects nested spans of a scrape and exports them to a local file.
+
+    Parent/child links follow ``contextvars``, so nesting is tracked per
+    thread and per asyncio task. Work handed to a thread pool keeps its
+    parent when submitted through ``contextvars.copy_context().run``.
+    """
+
+    enabled = True
+
+    def __init__(self, service_name: str = "instagram_scraper") -> None:
+        self.service_name = service_name
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._epoch_ns = time.time_ns() - time.perf_counter_ns()
+
+    def span(self, name: str, **attrs: Any) -> Span:
+        return Span(self, name, attrs)
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def _finished(self) -> List[Span]:
+        with self._lock:
+            return sorted(self.spans, key=lambda span: span.start_ns)
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Trace-event JSON for chrome://tracing, Perfetto or speedscope."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": span.name.split(".", 1)[0],
+                "ph": "X",
+                "ts": (self._epoch_ns + span.start_ns) / 1000,
+                "dur": span.duration_ns / 1000,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": {key: _attr_value(value) for key, value in span.attrs.items()},
+            }
+            for span in self._finished()
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def otlp_json(self) -> Dict[str, Any]:
+        """Spans in the OpenTelemetry OTLP/JSON layout (``resourceSpans``)."""
+        spans = [
+            {
+                "traceId": self.trace_id,
+                "spanId": f"{span.span_id:016x}",
+                "parentSpanId": (
+                    f"{span.parent_id:016x}" if span.parent_id is not None else ""
+                ),
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(self._epoch_ns + span.start_ns),
+                "endTimeUnixNano": str(self._epoch_ns + span.end_ns),
+                "attributes": [
+                    {"key": key, "value": _otlp_value(value)}
+                    for key, value in span.attrs.items()
+                ],
+            }
+            for span in self._finished()
+        ]
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": self.service_name},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [{"scope": {"name": "scraper"}, "spans": spans}],
+                }
+            ]
+        }
+
+    def export(self, path: str, fmt: str = "chrome") -> None:
+        if fmt == "chrome":
+            payload = self.chrome_trace()
+        elif fmt == "otlp":
+            payload = self.otlp_json()
+        else:
+            raise ValueError(
+                f"Unknown trace format {fmt!r}, expected one of {TRACE_FORMATS}"
+            )
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh)
+
+
+def current_span() -> "Span | _NullSpan":
+    span = _current_span.get()
+    return span if span is not None else NULL_SPAN
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """Wrap a method in a span from ``self.tracer``."""
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            with self.tracer.span(name):
+                return func(self, *args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def _attr_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": "" if value is None else str(value)}